@@ -1,18 +1,33 @@
 from collections.abc import AsyncGenerator
 from acp_sdk.models import Message, MessagePart, Metadata
 from acp_sdk.server import RunYield, RunYieldResume, Server
-import json
+from collections import defaultdict
+import asyncio
+import logging
 import os
+import re
+import sys
+
+import orjson
 
 from crewai import Crew, Task, Agent, LLM
+from crewai.utilities.events import LLMCallStartedEvent, LLMStreamChunkEvent, crewai_event_bus
 from crewai_tools import RagTool
 
-import nest_asyncio
+from faiss_rag import CHUNK_OVERLAP, CHUNK_SIZE, EMBED_BATCH_SIZE, EMBEDDING_MODEL, RAG_CACHE_DIR, faiss_adapter
 
-nest_asyncio.apply()
+# Logs go to stderr so they never interleave with ACP output; crewai's own verbose
+# printing is turned off in favour of one structured debug record per agent step.
+# force=True replaces the root handler gptcache (via crewai_tools) installs at import,
+# and server.run() is told not to add its own, so every record prints once. LOG_LEVEL
+# applies to the archivist's logger, not the root, so DEBUG turns on its step traces.
+logging.basicConfig(level=logging.INFO, stream=sys.stderr, force=True)
+logging.getLogger("archivist").setLevel(os.getenv("LOG_LEVEL", "INFO"))
+logging.getLogger("crewai").setLevel(os.getenv("CREWAI_LOG_LEVEL", "WARNING"))
+logger = logging.getLogger("archivist")
 
 server = Server()
-llm = LLM(model="openai/gpt-4o", max_tokens=1024)
+llm = LLM(model="openai/gpt-4o", max_tokens=1024, stream=True)
 
 config = {
     "llm": {
@@ -23,9 +38,287 @@ config = {
     },
     "embedding_model": {
         "provider": "openai",
-        "config": {"model": "text-embedding-ada-002"},
+        "config": {"model": EMBEDDING_MODEL},
     },
 }
+
+# Per-book RAG indexes are expensive to build (chunk + embed the whole novel), so we
+# build each one once and reuse it. Embeddings also persist on disk under .rag_cache/
+# so a restarted server does not have to re-embed books it has already seen.
+_RAG_CACHE: dict[str, RagTool] = {}
+_RAG_LOCKS: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+# Vector store backing the RAG tool: "faiss" (default, in-process HNSW index saved to
+# .rag_cache/<book>/, settings in faiss_rag.py) or "chroma" (crewai_tools' default
+# Embedchain store).
+VECTOR_STORE = os.getenv("RAG_VECTOR_STORE", "faiss")
+
+
+def _rag_config(book_title: str) -> dict:
+    vectordb = {
+        "provider": "chroma",
+        "config": {
+            "collection_name": book_title,
+            "dir": os.path.join(RAG_CACHE_DIR, book_title),
+            "batch_size": EMBED_BATCH_SIZE,
+        },
+    }
+    return {**config, "vectordb": vectordb}
+
+
+def _make_rag_tool(book_title: str) -> RagTool:
+    if VECTOR_STORE == "faiss":
+        # Embedchain has no FAISS store, so plug our own adapter into RagTool. It loads
+        # prebuilt data/<book>.faiss artifacts when present instead of re-embedding.
+        return RagTool(adapter=faiss_adapter(book_title))
+    return RagTool(
+        config=_rag_config(book_title),
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+    )
+
+
+async def get_rag_tool(book_title: str, filename: str) -> RagTool:
+    rag_tool = _RAG_CACHE.get(book_title)
+    if rag_tool is not None:
+        return rag_tool
+    async with _RAG_LOCKS[book_title]:
+        # Another request may have built it while we were waiting on the lock
+        rag_tool = _RAG_CACHE.get(book_title)
+        if rag_tool is None:
+            rag_tool = _make_rag_tool(book_title)
+            # Add the local text file to the RAG index. Some versions of crewai_tools expect a
+            # positional path argument rather than a named 'file_path'.
+            await asyncio.to_thread(rag_tool.add, filename)
+            _RAG_CACHE[book_title] = rag_tool
+    return rag_tool
+
+
+# One Agent + Crew per book, built on first use. Each request only creates a fresh
+# Task; since the Task is swapped onto the shared Crew, runs for the same book are
+# serialized by that book's lock.
+_CREW_CACHE: dict[str, Crew] = {}
+_CREW_LOCKS: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
+def _log_step(step) -> None:
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    record = {"step": type(step).__name__}
+    for field in ("thought", "tool", "tool_input", "result", "output"):
+        value = getattr(step, field, None)
+        if value is not None:
+            record[field] = str(value)
+    logger.debug(orjson.dumps(record).decode())
+
+
+def _build_crew(book_title: str, rag_tool: RagTool) -> Crew:
+    # Define the CrewAI agent with a generalized role
+    archivist = Agent(
+        role="Literary Archivist",
+        goal=f"Provide accurate, verbatim quotes and summaries from the book '{book_title}'",
+        backstory=f"You are a meticulous archivist with a perfect memory of the book '{book_title}'. Your purpose is to retrieve and present information from the text without interpretation or analysis.",
+        verbose=False,
+        allow_delegation=False,
+        llm=llm,
+        tools=[rag_tool],
+        max_retry_limit=5,
+        step_callback=_log_step,
+    )
+    return Crew(agents=[archivist], tasks=[], verbose=False)
+
+
+# Streaming: the LLM streams every call and crewai publishes each chunk on its event
+# bus. For tasks registered here, chunks are forwarded from the crew's worker thread
+# to the request's queue. What is forwarded follows crewai's parser: the answer is the
+# text after the last "Final Answer:", stripped, minus an unmatched trailing ```. The
+# tail that could still change under those rules is held back until more text arrives.
+_FINAL_ANSWER = "Final Answer:"
+_STREAMS: dict[str, dict] = {}
+
+
+def _streamable_answer(text: str) -> str | None:
+    """The prefix of the final answer in partial LLM output that parsing cannot change."""
+    if _FINAL_ANSWER not in text:
+        return None
+    answer = text.split(_FINAL_ANSWER)[-1].lstrip()
+    # A later marker, trailing whitespace or a closing ``` may still arrive
+    for k in range(len(_FINAL_ANSWER) - 1, 0, -1):
+        if answer.endswith(_FINAL_ANSWER[:k]):
+            answer = answer[:-k]
+            break
+    return answer.rstrip().rstrip("`").rstrip()
+
+
+@crewai_event_bus.on(LLMCallStartedEvent)
+def _reset_stream(source, event: LLMCallStartedEvent) -> None:
+    stream = _STREAMS.get(str(event.task_id))
+    if stream is not None:
+        # A new call (next step or retry) is parsed on its own; what was already
+        # forwarded stays forwarded, so it is only extended if the new answer agrees
+        stream["text"] = ""
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _forward_chunk(source, event: LLMStreamChunkEvent) -> None:
+    stream = _STREAMS.get(str(event.task_id))
+    if stream is None:
+        return
+    stream["text"] += event.chunk
+    answer = _streamable_answer(stream["text"])
+    sent = stream["sent"]
+    if answer is None or len(answer) <= len(sent) or not answer.startswith(sent):
+        return
+    stream["loop"].call_soon_threadsafe(stream["queue"].put_nowait, answer[len(sent):])
+    stream["sent"] = answer
+
+
+async def ask_archivist(
+    book_title: str, filename: str, query: str, stream: asyncio.Queue | None = None, batch: bool = False
+) -> str:
+    async with _CREW_LOCKS[book_title]:
+        crew = _CREW_CACHE.get(book_title)
+        if crew is None:
+            # Reuse the cached RAG tool for the requested book, building it on first use
+            rag_tool = await get_rag_tool(book_title, filename)
+            crew = _CREW_CACHE[book_title] = _build_crew(book_title, rag_tool)
+
+        # Define the task for the agent. A batch answers several questions in one reply,
+        # so it asks for concise answers and gets a larger token budget.
+        archivist = crew.agents[0]
+        archivist.llm = batch_llm if batch else llm
+        task1 = Task(
+            description=query,
+            expected_output=(
+                "A concise, factual answer to every numbered question, each starting with 'ANSWER <n>:'."
+                if batch
+                else "A comprehensive, factual answer based on the book's content."
+            ),
+            agent=archivist,
+        )
+        crew.tasks = [task1]
+        if stream is not None:
+            _STREAMS[str(task1.id)] = {
+                "loop": asyncio.get_running_loop(), "queue": stream, "text": "", "sent": "",
+            }
+        try:
+            # Run the blocking crew in a worker thread so the ACP event loop keeps serving
+            task_output = await asyncio.to_thread(crew.kickoff)
+        finally:
+            _STREAMS.pop(str(task1.id), None)
+    return str(task_output)
+
+
+# Micro-batching of concurrent archivist queries: requests that arrive within
+# BATCH_WINDOW_MS of each other are coalesced. Each book then has at most one crew
+# run in flight; queries for a book that arrive while its crew is busy wait in that
+# book's pending list and go out together as the next run, with a numbered prompt.
+# Different books run concurrently.
+BATCH_WINDOW_MS = float(os.getenv("ARCHIVIST_BATCH_WINDOW_MS", "10"))
+BATCH_MAX = int(os.getenv("ARCHIVIST_BATCH_MAX", "4"))
+batch_llm = LLM(model="openai/gpt-4o", max_tokens=1024 * BATCH_MAX, stream=True)
+# Tolerates markdown around the marker, e.g. "**ANSWER 1:**", "### ANSWER 1:", "**ANSWER 1**:"
+_ANSWER_RE = re.compile(r"^[ \t>#*_]*ANSWER\s+(\d+)[ \t*_]*:[ \t*_]*", re.MULTILINE | re.IGNORECASE)
+_QUERY_QUEUE: asyncio.Queue | None = None
+_BATCH_WORKER: asyncio.Task | None = None
+_PENDING: defaultdict[str, list[tuple]] = defaultdict(list)
+_BOOK_RUNNERS: dict[str, asyncio.Task] = {}
+
+
+def _batch_prompt(queries: list[str]) -> str:
+    numbered = "\n".join(f"QUESTION {i}: {q}" for i, q in enumerate(queries, 1))
+    return (
+        "Answer each of the following questions about the book independently. "
+        "Start each answer on its own line with 'ANSWER <n>:' where <n> is the question number.\n\n"
+        + numbered
+    )
+
+
+def _split_answers(text: str, n: int) -> dict[int, str]:
+    """Map question number (1..n) to its answer for every numbered answer found in `text`."""
+    parts = _ANSWER_RE.split(text)
+    answers = {int(num): body.strip() for num, body in zip(parts[1::2], parts[2::2])}
+    return {i: answer for i, answer in answers.items() if 1 <= i <= n and answer}
+
+
+async def _run_book_batch(book_title: str, items: list[tuple]):
+    filename = items[0][1]
+    queries = [item[2] for item in items]
+    try:
+        if len(items) == 1:
+            # Only an unbatched query streams; a batched answer has to be split first
+            answers = [await ask_archivist(book_title, filename, queries[0], items[0][3])]
+        else:
+            combined = await ask_archivist(book_title, filename, _batch_prompt(queries), batch=True)
+            parsed = _split_answers(combined, len(queries))
+            # Keep what parsed; only questions the reply missed are asked again on their own
+            answers = [
+                parsed.get(i) or await ask_archivist(book_title, filename, q)
+                for i, q in enumerate(queries, 1)
+            ]
+    except Exception as e:
+        for *_, future in items:
+            if not future.done():
+                future.set_exception(e)
+        return
+    for (*_, future), answer in zip(items, answers):
+        if not future.done():
+            future.set_result(answer)
+
+
+async def _drain_book(book_title: str):
+    pending = _PENDING[book_title]
+    try:
+        while pending:
+            # Everything queued while the previous run was busy becomes one batch
+            items = pending[:BATCH_MAX]
+            del pending[:BATCH_MAX]
+            await _run_book_batch(book_title, items)
+    finally:
+        del _BOOK_RUNNERS[book_title]
+
+
+def _dispatch(batch: list[tuple]):
+    for item in batch:
+        _PENDING[item[0]].append(item)
+    for book_title in {item[0] for item in batch}:
+        if book_title not in _BOOK_RUNNERS:
+            _BOOK_RUNNERS[book_title] = asyncio.create_task(_drain_book(book_title))
+
+
+async def _batch_worker():
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _QUERY_QUEUE.get()]
+        deadline = loop.time() + BATCH_WINDOW_MS / 1000
+        while len(batch) < BATCH_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_QUERY_QUEUE.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Books with a run in flight keep these queued for their next batch
+        _dispatch(batch)
+
+
+async def submit_query(
+    book_title: str, filename: str, query: str, stream: asyncio.Queue | None = None
+) -> str:
+    """Queue a query for batching. If `stream` is given, final-answer chunks are put on
+    it while an unbatched run generates them, followed by None once the query is done."""
+    global _QUERY_QUEUE, _BATCH_WORKER
+    if _QUERY_QUEUE is None:
+        _QUERY_QUEUE = asyncio.Queue()
+    if _BATCH_WORKER is None or _BATCH_WORKER.done():
+        _BATCH_WORKER = asyncio.create_task(_batch_worker())
+    future = asyncio.get_running_loop().create_future()
+    if stream is not None:
+        future.add_done_callback(lambda _: stream.put_nowait(None))
+    await _QUERY_QUEUE.put((book_title, filename, query, stream, future))
+    return await future
+
+
 @server.agent(
     name="archivist_agent",
     metadata=Metadata(
@@ -39,11 +332,11 @@ async def archivist_agent(
     
     # Parse the incoming request
     try:
-        request_data = json.loads(input[0].parts[0].content)
+        request_data = orjson.loads(input[0].parts[0].content)
         book_title = request_data['book_title']
         query = request_data['query']
         filename = os.path.join(os.path.dirname(__file__), "data", f"{book_title}.txt")
-    except (json.JSONDecodeError, KeyError) as e:
+    except (orjson.JSONDecodeError, KeyError) as e:
         error_message = f"Invalid input format. Please provide a JSON string with 'book_title' and 'query'. Error: {e}"
         yield Message(parts=[MessagePart(content=error_message)])
         return
@@ -53,46 +346,48 @@ async def archivist_agent(
         data_dir = os.path.join(os.path.dirname(__file__), "data")
         available = []
         if os.path.isdir(data_dir):
-            available = [os.path.splitext(f)[0] for f in os.listdir(data_dir) if f.endswith('.txt')]
+            with os.scandir(data_dir) as it:
+                available = [os.path.splitext(e.name)[0] for e in it if e.name.endswith('.txt') and e.is_file()]
         yield Message(parts=[MessagePart(content=(
             "Requested book not found: '" + book_title + "'. "
             "Ensure the 'book_title' matches one of: " + ", ".join(available)
         ))])
         return
 
-    # Dynamically create and configure the RAG tool for the requested book
-    rag_tool = RagTool(
-        config=config,
-        chunk_size=1200,
-        chunk_overlap=200,
-    )
-    # Add the local text file to the RAG index. Some versions of crewai_tools expect a
-    # positional path argument rather than a named 'file_path'.
-    rag_tool.add(filename)
+    # Relay the answer as it is generated, then whatever the stream did not cover
+    # (all of it for a batched run, which does not stream). If the final answer does
+    # not continue what was streamed, it is sent whole as its own message.
+    chunks: asyncio.Queue = asyncio.Queue()
+    answer_task = asyncio.ensure_future(submit_query(book_title, filename, query, chunks))
+    streamed = ""
+    while (chunk := await chunks.get()) is not None:
+        streamed += chunk
+        yield MessagePart(content=chunk)
+    answer = await answer_task
+    if answer.startswith(streamed) and streamed:
+        if answer != streamed:
+            yield MessagePart(content=answer[len(streamed):])
+    else:
+        yield Message(parts=[MessagePart(content=answer)])
 
-    # Define the CrewAI agent with a generalized role
-    archivist = Agent(
-        role="Literary Archivist",
-        goal=f"Provide accurate, verbatim quotes and summaries from the book '{book_title}'",
-        backstory=f"You are a meticulous archivist with a perfect memory of the book '{book_title}'. Your purpose is to retrieve and present information from the text without interpretation or analysis.",
-        verbose=True,
-        allow_delegation=False,
-        llm=llm,
-        tools=[rag_tool],
-        max_retry_limit=5,
-    )
 
-    # Define the task for the agent
-    task1 = Task(
-        description=query,
-        expected_output="A comprehensive, factual answer based on the book's content.",
-        agent=archivist,
-    )
-    crew = Crew(agents=[archivist], tasks=[task1], verbose=True)
+# Optional startup warm-up (WARMUP=1): index a default book and open the LLM client
+# before accepting requests, so the first user query does not pay for it.
+WARMUP = os.getenv("WARMUP", "0") in {"1", "true", "True"}
+WARMUP_BOOK = os.getenv("WARMUP_BOOK", "mobydick")
 
-    task_output = await crew.kickoff_async()
-    yield Message(parts=[MessagePart(content=str(task_output))])
+
+async def _warmup():
+    filename = os.path.join(os.path.dirname(__file__), "data", f"{WARMUP_BOOK}.txt")
+    if os.path.isfile(filename):
+        await get_rag_tool(WARMUP_BOOK, filename)
+    try:
+        await asyncio.to_thread(llm.call, "ping")
+    except Exception as e:
+        logger.warning("LLM warm-up failed: %s", e)
 
 
 if __name__ == "__main__":
-    server.run(port=8001)
+    if WARMUP:
+        asyncio.run(_warmup())
+    server.run(port=8001, configure_logger=False)
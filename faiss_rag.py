@@ -0,0 +1,252 @@
+"""
+FAISS-backed RAG adapter for crewai_tools' RagTool
+
+RagTool delegates indexing and retrieval to an `Adapter` (Embedchain + Chroma by
+default). This adapter keeps the whole index in-process with FAISS (HNSW) instead,
+which avoids sqlite round-trips on insert and query. Vectors are stored as int8
+(FAISS scalar quantizer, per-dimension min/max learned at build time) unless
+quantization="none", cutting index memory 4x.
+
+An index is stored as three files:
+
+- chunks.jsonl -> a header line with the fingerprint (source hash + chunking/embedding
+                  settings) and index settings, then one {"text": ...} line per chunk
+                  (row i of the index is chunk i)
+- emb.npy      -> the N x D float32 chunk embeddings
+- *.faiss      -> the FAISS index
+
+`add(path)` first looks for prebuilt artifacts next to the source file
+(data/<book>.chunks.jsonl, .emb.npy, .faiss; see scripts/build_rag_artifacts.py),
+then for a previous build in `persist_dir`, and only chunks and embeds the book when
+neither matches. When only the index settings changed, the saved embeddings are
+reused and the rebuilt index is written back in place of the stale one.
+
+The archivist's settings live here too (`faiss_adapter`), so crew_agent_server.py
+and the build script share them without the script importing the server.
+
+Usage:
+    tool = RagTool(adapter=FaissAdapter(persist_dir=".rag_cache/mobydick"))
+    tool.add("data/mobydick.txt")
+"""
+
+import hashlib
+import os
+from typing import Any, List, Optional, Tuple
+
+import faiss
+import numpy as np
+import orjson
+from crewai_tools.tools.rag.rag_tool import Adapter
+from openai import OpenAI
+from pydantic import PrivateAttr, model_validator
+
+# Per-book builds persist under .rag_cache/<book>/ so a restarted server does not have
+# to re-embed books it has already seen.
+RAG_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".rag_cache")
+# Chunks are embedded this many at a time, so a novel costs a handful of embedding
+# requests instead of hundreds. Kept well below OpenAI's per-request input/token
+# limits for ~1200 character chunks.
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "512"))
+# Embedding model and chunking shared by every vector store the archivist can use
+EMBEDDING_MODEL = "text-embedding-3-small"
+CHUNK_SIZE = 1200
+CHUNK_OVERLAP = 200
+# Truncated embedding size and vector encoding ("int8" or "none")
+EMBED_DIMENSIONS = int(os.getenv("EMBED_DIMENSIONS", "512"))
+RAG_QUANTIZATION = os.getenv("RAG_QUANTIZATION", "int8")
+
+
+def artifact_paths(source: str) -> Tuple[str, str, str]:
+    """Prebuilt (chunks, embeddings, index) paths shipped next to a source text file."""
+    base = os.path.splitext(source)[0]
+    return f"{base}.chunks.jsonl", f"{base}.emb.npy", f"{base}.faiss"
+
+
+def split_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """Split text into overlapping windows, preferring to break on whitespace."""
+    # Each window must advance past the previous one, or the loop never ends
+    if not 0 <= chunk_overlap < chunk_size:
+        raise ValueError(f"need 0 <= chunk_overlap < chunk_size, got {chunk_overlap} and {chunk_size}")
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            # Back up to the last whitespace so words are not cut in half
+            space = text.rfind(" ", start + chunk_overlap + 1, end)
+            if space != -1:
+                end = space
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = end - chunk_overlap
+    return chunks
+
+
+class FaissAdapter(Adapter):
+    persist_dir: str
+    embedding_model: str = EMBEDDING_MODEL
+    # Truncated embedding size (text-embedding-3-* only); None keeps the model default
+    dimensions: Optional[int] = 512
+    quantization: str = "int8"
+    chunk_size: int = CHUNK_SIZE
+    chunk_overlap: int = CHUNK_OVERLAP
+    batch_size: int = 512
+    top_k: int = 5
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 64
+
+    _client: Any = PrivateAttr(default=None)
+    _index: Any = PrivateAttr(default=None)
+    _chunks: List[str] = PrivateAttr(default_factory=list)
+
+    @model_validator(mode="after")
+    def _check_chunking(self) -> "FaissAdapter":
+        if not 0 <= self.chunk_overlap < self.chunk_size:
+            raise ValueError(
+                f"need 0 <= chunk_overlap < chunk_size, got {self.chunk_overlap} and {self.chunk_size}"
+            )
+        return self
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimensions or 0), dtype="float32")
+        if self._client is None:
+            self._client = OpenAI()
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            kwargs = {"dimensions": self.dimensions} if self.dimensions else {}
+            resp = self._client.embeddings.create(
+                model=self.embedding_model, input=texts[i:i + self.batch_size], **kwargs
+            )
+            vectors.extend(d.embedding for d in resp.data)
+        arr = np.asarray(vectors, dtype="float32")
+        faiss.normalize_L2(arr)
+        return arr
+
+    def _build_index(self, vectors: np.ndarray):
+        if len(vectors) == 0:
+            # Empty source text: nothing to index, query() returns no context
+            return None
+        d = vectors.shape[1]
+        if self.quantization == "int8":
+            index = faiss.IndexHNSWSQ(d, faiss.ScalarQuantizer.QT_8bit, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            # Learns the per-dimension ranges used to map floats onto 8-bit codes
+            index.train(vectors)
+        else:
+            index = faiss.IndexHNSWFlat(d, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = self.ef_construction
+        index.add(vectors)
+        return index
+
+    def _fingerprint(self, path: str) -> dict:
+        # Hash the content rather than use mtime so shipped artifacts survive a checkout
+        with open(path, "rb") as fp:
+            digest = hashlib.sha256(fp.read()).hexdigest()
+        return {
+            "sha256": digest,
+            "embedding_model": self.embedding_model,
+            "dimensions": self.dimensions,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+        }
+
+    def _index_settings(self) -> dict:
+        return {"quantization": self.quantization, "M": self.hnsw_m, "ef_construction": self.ef_construction}
+
+    def _persist_paths(self) -> Tuple[str, str, str]:
+        return (
+            os.path.join(self.persist_dir, "chunks.jsonl"),
+            os.path.join(self.persist_dir, "emb.npy"),
+            os.path.join(self.persist_dir, "index.faiss"),
+        )
+
+    def _load(self, paths: Tuple[str, str, str], fingerprint: dict) -> bool:
+        chunks_path, emb_path, index_path = paths
+        if not os.path.isfile(chunks_path):
+            return False
+        with open(chunks_path, "rb") as fp:
+            header = orjson.loads(fp.readline())
+            if header.get("fingerprint") != fingerprint:
+                return False
+            chunks = [orjson.loads(line)["text"] for line in fp if line.strip()]
+        if header.get("index") == self._index_settings() and os.path.isfile(index_path):
+            self._index = faiss.read_index(index_path)
+            self._chunks = chunks
+        elif os.path.isfile(emb_path):
+            # Embeddings are still valid; only the index needs rebuilding. Save it (and
+            # the new index settings) so the next load reads it instead of rebuilding.
+            self._index = self._build_index(np.load(emb_path))
+            self._chunks = chunks
+            self._save(paths, fingerprint)
+        else:
+            return False
+        return True
+
+    def _save(self, paths: Tuple[str, str, str], fingerprint: dict, vectors: Optional[np.ndarray] = None):
+        # Each file is written to a temporary path and swapped in with os.replace. The
+        # chunks file goes last: its header is what marks the other two as current, so
+        # a crash part-way leaves a stale header that the next load rejects.
+        chunks_path, emb_path, index_path = paths
+        os.makedirs(os.path.dirname(chunks_path) or ".", exist_ok=True)
+        if vectors is not None:
+            with open(emb_path + ".tmp", "wb") as fp:
+                np.save(fp, vectors)
+            os.replace(emb_path + ".tmp", emb_path)
+        if self._index is not None:
+            faiss.write_index(self._index, index_path + ".tmp")
+            os.replace(index_path + ".tmp", index_path)
+        with open(chunks_path + ".tmp", "wb") as fp:
+            fp.write(orjson.dumps({"fingerprint": fingerprint, "index": self._index_settings()}) + b"\n")
+            for chunk in self._chunks:
+                fp.write(orjson.dumps({"text": chunk}) + b"\n")
+        os.replace(chunks_path + ".tmp", chunks_path)
+
+    def build(self, source: str, paths: Optional[Tuple[str, str, str]] = None) -> None:
+        """Chunk, embed and index `source`, writing the result to `paths` (default: persist_dir)."""
+        with open(source, "r", encoding="utf-8") as fp:
+            self._chunks = split_text(fp.read(), self.chunk_size, self.chunk_overlap)
+        vectors = self._embed(self._chunks)
+        self._index = self._build_index(vectors)
+        self._save(paths or self._persist_paths(), self._fingerprint(source), vectors)
+
+    def has_artifacts(self, source: str) -> bool:
+        """True if up-to-date prebuilt artifacts exist next to `source` (and loads them).
+
+        Artifacts whose embeddings are current but whose index was built with other
+        settings count as up to date: the index is rebuilt and rewritten in place.
+        """
+        return self._load(artifact_paths(source), self._fingerprint(source))
+
+    def add(self, source: str, *args: Any, **kwargs: Any) -> None:
+        fingerprint = self._fingerprint(source)
+        if self._load(artifact_paths(source), fingerprint):
+            return
+        if self._load(self._persist_paths(), fingerprint):
+            return
+        self.build(source)
+
+    def query(self, question: str) -> str:
+        if self._index is None or not self._chunks:
+            return ""
+        self._index.hnsw.efSearch = max(self.ef_search, self.top_k)
+        _, ids = self._index.search(self._embed([question]), self.top_k)
+        return "\n\n".join(self._chunks[i] for i in ids[0] if i != -1)
+
+
+def faiss_adapter(book_title: str) -> FaissAdapter:
+    """FAISS adapter configured for the archivist; also used by scripts/build_rag_artifacts.py."""
+    return FaissAdapter(
+        persist_dir=os.path.join(RAG_CACHE_DIR, book_title),
+        embedding_model=EMBEDDING_MODEL,
+        dimensions=EMBED_DIMENSIONS,
+        quantization=RAG_QUANTIZATION,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        batch_size=EMBED_BATCH_SIZE,
+        hnsw_m=32,
+        ef_construction=200,
+    )
@@ -1,10 +1,11 @@
 import asyncio
-import json
+import functools
 import os
-from typing import Tuple
+from typing import Awaitable, Callable, Optional, Tuple
 
+import orjson
 from acp_sdk.client import Client
-from acp_sdk.models import Message, MessagePart
+from acp_sdk.models import Message, MessagePart, MessagePartEvent, RunFailedEvent
 
 
 AGENTS: dict[str, Tuple[str, str]] = {
@@ -25,29 +26,78 @@ ALIASES = {
 HERE = os.path.dirname(__file__)
 META_PATH = os.path.join(HERE, "book_metadata.json")
 
+@functools.lru_cache(maxsize=256)
 def normalize_key(user_key: str) -> str:
     k = user_key.strip().lower()
     return ALIASES.get(k, k)
 
-def load_metadata() -> dict:
+# Keyed on the file's mtime so the JSON is only re-read after it changes
+@functools.lru_cache(maxsize=1)
+def _load_meta_cached(mtime_ns: int) -> dict:
     try:
-        with open(META_PATH, "r", encoding="utf-8") as fp:
-            return json.load(fp)
+        with open(META_PATH, "rb") as fp:
+            return orjson.loads(fp.read())
     except Exception:
         return {}
 
+def load_metadata() -> dict:
+    try:
+        mtime_ns = os.stat(META_PATH).st_mtime_ns
+    except OSError:
+        return {}
+    return _load_meta_cached(mtime_ns)
+
+
+# One long-lived client per server so repeated calls reuse the same keep-alive
+# connection instead of reconnecting on every request.
+_CLIENTS: dict[str, Client] = {}
+
+
+async def _get_client(base_url: str) -> Client:
+    client = _CLIENTS.get(base_url)
+    if client is None:
+        client = Client(base_url=base_url)
+        await client.__aenter__()
+        _CLIENTS[base_url] = client
+    return client
+
+
+async def _close_clients():
+    while _CLIENTS:
+        _, client = _CLIENTS.popitem()
+        await client.__aexit__(None, None, None)
+
 
 async def call_agent(base_url: str, agent_name: str, content: str):
-    async with Client(base_url=base_url) as client:
-        run = await client.run_sync(
-            agent=agent_name,
-            input=[Message(parts=[MessagePart(content=content)])],
-        )
-        if run.output and run.output[0].parts:
-            return run.output[0].parts[0].content
-        if run.error:
-            return f"[ERROR] {run.error}"
-        return "[EMPTY RESPONSE]"
+    client = await _get_client(base_url)
+    run = await client.run_sync(
+        agent=agent_name,
+        input=[Message(parts=[MessagePart(content=content)])],
+    )
+    if run.output and run.output[0].parts:
+        # Streaming agents deliver one message split across many parts
+        return "".join(part.content for part in run.output[0].parts)
+    if run.error:
+        return f"[ERROR] {run.error}"
+    return "[EMPTY RESPONSE]"
+
+
+async def stream_agent(base_url: str, agent_name: str, content: str):
+    """Print the agent's response as it streams in, instead of waiting for the full run."""
+    client = await _get_client(base_url)
+    print("[Response] ", end="", flush=True)
+    received = False
+    async for event in client.run_stream(
+        agent=agent_name,
+        input=[Message(parts=[MessagePart(content=content)])],
+    ):
+        if isinstance(event, MessagePartEvent) and event.part.content:
+            print(event.part.content, end="", flush=True)
+            received = True
+        elif isinstance(event, RunFailedEvent):
+            print(f"[ERROR] {event.run.error}", end="")
+            received = True
+    print("" if received else "[EMPTY RESPONSE]")
 
 
 def print_banner(current: str):
@@ -63,6 +113,73 @@ def print_banner(current: str):
     print(f"\nActive agent: {current} -> {AGENTS[current][1]} @ {AGENTS[current][0]}")
 
 
+# Command handlers take (active agent, argument text) and return the active agent
+# afterwards, or None to quit.
+async def _cmd_exit(current: str, rest: str) -> Optional[str]:
+    print("Goodbye!")
+    return None
+
+
+async def _cmd_help(current: str, rest: str) -> Optional[str]:
+    print_banner(current)
+    return current
+
+
+async def _cmd_agents(current: str, rest: str) -> Optional[str]:
+    for k, (url, name) in AGENTS.items():
+        print(f"- {k}: {name} @ {url}")
+    return current
+
+
+async def _cmd_use(current: str, rest: str) -> Optional[str]:
+    name = rest.strip()
+    if name in AGENTS:
+        current = name
+        print(f"Switched to '{current}' -> {AGENTS[current][1]} @ {AGENTS[current][0]}")
+    else:
+        print(f"Unknown agent '{name}'. Try one of: {', '.join(AGENTS.keys())}")
+    return current
+
+
+async def _cmd_meta(current: str, rest: str) -> Optional[str]:
+    key = normalize_key(rest)
+    meta = load_metadata().get(key)
+    if not meta:
+        print(f"No metadata found for '{key}'.")
+    else:
+        print(orjson.dumps(meta, option=orjson.OPT_INDENT_2).decode())
+    return current
+
+
+async def _cmd_list(current: str, rest: str) -> Optional[str]:
+    # Prefer critic to list, otherwise fall back to catalog
+    if "critic" in AGENTS:
+        url, agent_name = AGENTS["critic"]
+        prompt = "List the available books."
+    else:
+        url, agent_name = AGENTS["catalog"]
+        prompt = "list_available_books"
+    print("\n[Request]", agent_name, "<=", prompt)
+    print("[Response]", await call_agent(url, agent_name, prompt))
+    return current
+
+
+CommandHandler = Callable[[str, str], Awaitable[Optional[str]]]
+
+# Commands matched against the whole (lowercased) input
+_COMMANDS: dict[str, CommandHandler] = {
+    "/exit": _cmd_exit, "exit": _cmd_exit, "quit": _cmd_exit, ":q": _cmd_exit,
+    "/help": _cmd_help, "help": _cmd_help,
+    "/agents": _cmd_agents, "agents": _cmd_agents,
+    "/list": _cmd_list, "list": _cmd_list,
+}
+# Commands matched on the first token that take an argument
+_ARG_COMMANDS: dict[str, CommandHandler] = {
+    "/use": _cmd_use,
+    "/meta": _cmd_meta,
+}
+
+
 async def interactive():
     current = "critic"
     print_banner(current)
@@ -77,49 +194,13 @@ async def interactive():
         if not user_input:
             continue
 
-        if user_input.lower() in {"/exit", "exit", "quit", ":q"}:
-            print("Goodbye!")
-            break
-
-        if user_input.lower() in {"/help", "help"}:
-            print_banner(current)
-            continue
-
-        if user_input.lower() in {"/agents", "agents"}:
-            for k, (url, name) in AGENTS.items():
-                print(f"- {k}: {name} @ {url}")
-            continue
-
-        if user_input.lower().startswith("/use "):
-            _, _, name = user_input.partition(" ")
-            name = name.strip().lower()
-            if name in AGENTS:
-                current = name
-                print(f"Switched to '{current}' -> {AGENTS[current][1]} @ {AGENTS[current][0]}")
-            else:
-                print(f"Unknown agent '{name}'. Try one of: {', '.join(AGENTS.keys())}")
-            continue
-
-        if user_input.lower().startswith("/meta "):
-            _, _, key = user_input.partition(" ")
-            key = normalize_key(key)
-            meta = load_metadata().get(key)
-            if not meta:
-                print(f"No metadata found for '{key}'.")
-            else:
-                print(json.dumps(meta, indent=2, ensure_ascii=False))
-            continue
-
-        if user_input.lower() in {"/list", "list"}:
-            # Prefer critic to list, otherwise fall back to catalog
-            if "critic" in AGENTS:
-                url, agent_name = AGENTS["critic"]
-                prompt = "List the available books."
-            else:
-                url, agent_name = AGENTS["catalog"]
-                prompt = "list_available_books"
-            print("\n[Request]", agent_name, "<=", prompt)
-            print("[Response]", await call_agent(url, agent_name, prompt))
+        lc = user_input.lower()
+        cmd, _, rest = lc.partition(" ")
+        handler = _COMMANDS.get(lc) or (_ARG_COMMANDS.get(cmd) if rest else None)
+        if handler is not None:
+            current = await handler(current, rest)
+            if current is None:
+                break
             continue
 
         # Normal question flow
@@ -129,22 +210,29 @@ async def interactive():
         if current == "archivist":
             # If user already provided JSON, trust it; else guide them
             try:
-                _ = json.loads(user_input)
+                _ = orjson.loads(user_input)
                 payload = user_input
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 book_key = normalize_key(input("Book key (e.g., mobydick, frankenstein): ").strip())
-                payload = json.dumps({
+                payload = orjson.dumps({
                     "book_title": book_key,
                     "query": user_input,
-                })
+                }).decode()
             print("\n[Request]", agent_name, "<=", payload)
             print("[Response]", await call_agent(url, agent_name, payload))
             continue
 
         # Critic or Catalog (or any other) accept plain strings
         print("\n[Request]", agent_name, "<=", user_input)
-        print("[Response]", await call_agent(url, agent_name, user_input))
+        await stream_agent(url, agent_name, user_input)
+
+
+async def run_cli():
+    try:
+        await interactive()
+    finally:
+        await _close_clients()
 
 
 if __name__ == "__main__":
-    asyncio.run(interactive())
+    asyncio.run(run_cli())
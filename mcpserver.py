@@ -12,9 +12,11 @@ BOOK_METADATA_URL is set. Falls back to scanning data/*.txt for keys if metadata
 is missing.
 """
 
-import json
 import os
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional, Tuple
+
+import orjson
 
 from acp_sdk.models import Message, MessagePart
 from acp_sdk.server import Server
@@ -23,30 +25,88 @@ BASE_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(BASE_DIR, "data")
 LOCAL_META_PATH = os.path.join(BASE_DIR, "book_metadata.json")
 
+# Metadata and the book list are cached and only reloaded when the file/directory
+# mtime changes; remote metadata is reused for REMOTE_META_TTL seconds.
+REMOTE_META_TTL = float(os.getenv("BOOK_METADATA_TTL", "60"))
+_META_CACHE: Optional[Tuple[float, Dict[str, dict]]] = None
+_REMOTE_META_CACHE: Optional[Tuple[float, Dict[str, dict]]] = None
+_BOOKS_CACHE: Optional[Tuple[float, List[str]]] = None
+
+def _load_remote_metadata(url: str) -> Optional[Dict[str, dict]]:
+    global _REMOTE_META_CACHE
+    now = time.monotonic()
+    if _REMOTE_META_CACHE is not None and _REMOTE_META_CACHE[0] > now:
+        return _REMOTE_META_CACHE[1]
+    try:
+        import requests  # lazy import
+        resp = requests.get(url, timeout=10)
+        resp.raise_for_status()
+        data = orjson.loads(resp.content)
+    except Exception:
+        return None
+    _REMOTE_META_CACHE = (now + REMOTE_META_TTL, data)
+    return data
+
 def load_metadata() -> Dict[str, dict]:
+    global _META_CACHE
     url = os.getenv("BOOK_METADATA_URL")
     if url:
-        try:
-            import requests  # lazy import
-            resp = requests.get(url, timeout=10)
-            resp.raise_for_status()
-            return resp.json()
-        except Exception:
-            pass  # fall back to local
+        data = _load_remote_metadata(url)
+        if data is not None:
+            return data
+        # fall back to local
+    try:
+        mtime = os.stat(LOCAL_META_PATH).st_mtime
+    except OSError:
+        return {}
+    if _META_CACHE is not None and _META_CACHE[0] == mtime:
+        return _META_CACHE[1]
     try:
-        with open(LOCAL_META_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(LOCAL_META_PATH, "rb") as f:
+            data = orjson.loads(f.read())
     except Exception:
         return {}
+    _META_CACHE = (mtime, data)
+    return data
 
 def scan_books() -> List[str]:
-    if not os.path.isdir(DATA_DIR):
+    global _BOOKS_CACHE
+    try:
+        mtime = os.stat(DATA_DIR).st_mtime
+    except OSError:
+        return []
+    if _BOOKS_CACHE is not None and _BOOKS_CACHE[0] == mtime:
+        return _BOOKS_CACHE[1]
+    # One readdir pass; DirEntry.is_file() uses the cached d_type instead of a stat per file
+    try:
+        with os.scandir(DATA_DIR) as it:
+            books = [os.path.splitext(e.name)[0] for e in it if e.name.endswith(".txt") and e.is_file()]
+    except OSError:
         return []
-    return [
-        os.path.splitext(f)[0]
-        for f in os.listdir(DATA_DIR)
-        if f.endswith(".txt") and os.path.isfile(os.path.join(DATA_DIR, f))
-    ]
+    _BOOKS_CACHE = (mtime, books)
+    return books
+
+# Responses are pure functions of the loaded metadata (or book list), so keep them
+# serialized. Entries remember the object they were built from; since the loaders
+# above return the same object until the underlying data changes, an identity check
+# is enough to detect staleness.
+_RESP_CACHE: Dict[str, Tuple[object, str]] = {}
+_META_RESP: Tuple[object, Dict[str, str]] = (None, {})
+
+def _cached_response(prompt: str, source: object, build) -> str:
+    cached = _RESP_CACHE.get(prompt)
+    if cached is not None and cached[0] is source:
+        return cached[1]
+    content = build()
+    _RESP_CACHE[prompt] = (source, content)
+    return content
+
+def _meta_responses(metadata: Dict[str, dict]) -> Dict[str, str]:
+    global _META_RESP
+    if _META_RESP[0] is not metadata:
+        # Serialize every entry once per metadata load
+        _META_RESP = (metadata, {k: orjson.dumps(v).decode() for k, v in metadata.items()})
+    return _META_RESP[1]
 
 server = Server()
 
@@ -56,13 +116,18 @@ def book_catalog_agent(input: list[Message]):
     metadata = load_metadata()
     if prompt == "__LIST__":
         # Prefer keys from metadata; otherwise use filesystem scan
-        keys = list(metadata.keys()) or scan_books()
-        return [Message(parts=[MessagePart(content=json.dumps(sorted(keys)))])]
+        source = metadata if metadata else scan_books()
+        content = _cached_response(prompt, source, lambda: orjson.dumps(sorted(source)).decode())
+        return [Message(parts=[MessagePart(content=content)])]
     if prompt.startswith("__META__:"):
         key = prompt.split(":", 1)[1]
-        meta = metadata.get(key, {})
-        return [Message(parts=[MessagePart(content=json.dumps(meta))])]
+        content = _meta_responses(metadata).get(key, "{}")
+        return [Message(parts=[MessagePart(content=content)])]
     return [Message(parts=[MessagePart(content="{}")])]
 
 if __name__ == "__main__":
+    if os.getenv("WARMUP", "0") in {"1", "true", "True"}:
+        # Prime the metadata and book-list caches before the first request
+        load_metadata()
+        scan_books()
     server.run(port=8003)
@@ -0,0 +1,53 @@
+"""
+Precompute the archivist's RAG artifacts for every book in data/.
+
+For each data/<book>.txt this writes data/<book>.chunks.jsonl, data/<book>.emb.npy
+and data/<book>.faiss using the same chunking, embedding and index settings as
+crew_agent_server.py (both take them from faiss_rag.faiss_adapter), so the server
+loads the index from disk instead of chunking and embedding the book on first use.
+Books whose artifacts are already current are skipped unless --force is given; if
+only the index settings changed, the saved embeddings are reused and just the
+.faiss index is rewritten.
+
+Usage:
+    uv run python scripts/build_rag_artifacts.py [--force] [book_key ...]
+"""
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from faiss_rag import artifact_paths, faiss_adapter  # noqa: E402
+
+DATA_DIR = os.path.join(ROOT, "data")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("books", nargs="*", help="Book keys to build (default: all data/*.txt)")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if artifacts are current")
+    args = parser.parse_args()
+
+    with os.scandir(DATA_DIR) as it:
+        available = sorted(os.path.splitext(e.name)[0] for e in it if e.name.endswith(".txt") and e.is_file())
+    books = args.books or available
+    unknown = sorted(set(books) - set(available))
+    if unknown:
+        sys.exit(f"Unknown book key(s): {', '.join(unknown)}. Available: {', '.join(available)}")
+
+    for book in books:
+        source = os.path.join(DATA_DIR, f"{book}.txt")
+        adapter = faiss_adapter(book)
+        if not args.force and adapter.has_artifacts(source):
+            print(f"{book}: up to date")
+            continue
+        print(f"{book}: chunking and embedding...")
+        adapter.build(source, artifact_paths(source))
+        print(f"{book}: wrote {', '.join(os.path.relpath(p, ROOT) for p in artifact_paths(source))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ async def main():
             input=[Message(parts=[MessagePart(content="List the available books.")])],
         )
         if run.output and run.output[0].parts:
-            print(run.output[0].parts[0].content)
+            print("".join(part.content for part in run.output[0].parts))
         elif run.error:
             print("ERROR:", run.error)
         else:
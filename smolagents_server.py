@@ -1,166 +1,471 @@
 
 from collections.abc import AsyncGenerator
-import json
+import asyncio
+import contextlib
 import os
+import re
+import threading
 
+import diskcache
+import httpx
+import orjson
 from acp_sdk.client import Client
 from acp_sdk.models import Message, MessagePart, Metadata
 from acp_sdk.server import RunYield, RunYieldResume, Server
+from markdownify import markdownify
 from smolagents import (
+    ActionStep,
+    ChatMessageStreamDelta,
     CodeAgent,
+    FinalAnswerStep,
     DuckDuckGoSearchTool,
     LiteLLMModel,
+    Tool,
     ToolCallingAgent,
     VisitWebpageTool,
 )
 from smolagents import tool as smoltool
+from smolagents.utils import truncate_content
 
 
 # This server will host our main "Literary Critic" agent
 server = Server()
 
+# Catalog/discovery can be backed by filesystem (default) or MCP via ACP
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+META_PATH = os.path.join(os.path.dirname(__file__), "book_metadata.json")
+
+# (mtime, value) caches so the directory scan and JSON parse only rerun on change
+_BOOKS_CACHE: tuple[float, list[str]] | None = None
+_META_CACHE: tuple[float, dict] | None = None
+
+
+def _scan_books() -> list[str]:
+    global _BOOKS_CACHE
+    try:
+        mtime = os.stat(DATA_DIR).st_mtime
+    except OSError:
+        return []
+    if _BOOKS_CACHE is not None and _BOOKS_CACHE[0] == mtime:
+        return _BOOKS_CACHE[1]
+    # One readdir pass; DirEntry.is_file() uses the cached d_type instead of a stat per file
+    try:
+        with os.scandir(DATA_DIR) as it:
+            books = [os.path.splitext(e.name)[0] for e in it if e.name.endswith(".txt") and e.is_file()]
+    except OSError:
+        return []
+    _BOOKS_CACHE = (mtime, books)
+    return books
+
+
+def _load_metadata() -> dict:
+    global _META_CACHE
+    try:
+        mtime = os.stat(META_PATH).st_mtime
+    except OSError:
+        return {}
+    if _META_CACHE is not None and _META_CACHE[0] == mtime:
+        return _META_CACHE[1]
+    try:
+        with open(META_PATH, "rb") as fp:
+            data = orjson.loads(fp.read())
+    except Exception:
+        return {}
+    _META_CACHE = (mtime, data)
+    return data
+
 # Define the model to be used by the agents
 model = LiteLLMModel(model_id="openai/gpt-4o", max_tokens=4096)
 
 
 
+# One long-lived ACP client per downstream server, reused across tool calls so each
+# hop does not pay for a fresh connection.
+ARCHIVIST_URL = "http://127.0.0.1:8001"
+CATALOG_URL = "http://127.0.0.1:8003"
+_CLIENTS: dict[str, Client] = {}
+_CLIENTS_LOCK = asyncio.Lock()
+
+
+async def _get_client(base_url: str) -> Client:
+    client = _CLIENTS.get(base_url)
+    if client is not None:
+        return client
+    async with _CLIENTS_LOCK:
+        # Another request may have opened it while we were waiting on the lock
+        client = _CLIENTS.get(base_url)
+        if client is None:
+            client = Client(base_url=base_url)
+            await client.__aenter__()
+            _CLIENTS[base_url] = client
+    return client
+
+
+async def _close_clients():
+    while _CLIENTS:
+        _, client = _CLIENTS.popitem()
+        with contextlib.suppress(Exception):
+            await client.__aexit__(None, None, None)
+
+
+# The server's event loop. Tools run in the critic's worker threads (smolagents calls
+# them synchronously), so their remote calls are scheduled back onto this loop,
+# where the shared ACP clients live.
+_SERVER_LOOP: asyncio.AbstractEventLoop | None = None
+
+
+def _on_server_loop(coro):
+    """Run `coro` on the server's event loop from a worker thread and wait for its result."""
+    if _SERVER_LOOP is None:
+        coro.close()
+        raise RuntimeError("the ACP server is not running")
+    return asyncio.run_coroutine_threadsafe(coro, _SERVER_LOOP).result()
+
+
+@contextlib.asynccontextmanager
+async def _lifespan(app):
+    global _SERVER_LOOP
+    _SERVER_LOOP = asyncio.get_running_loop()
+    # Close the shared clients on the server's own loop when it shuts down
+    try:
+        yield
+    finally:
+        await _close_clients()
+
+
+server.lifespan = _lifespan
+
+
+_ABOUT_RE = re.compile(r"\babout\s+(?:the\s+(?:book|novel)\s+)?(.+)")
+# Questions that need the historian (reception, authorship, historical context) must
+# go through the full agent rather than the archivist-only fast path.
+_HISTORIAN_HINTS_RE = re.compile(
+    r"\b(critic\w*|reception|review\w*|receiv\w*|publi\w*|author\w*|wr[io]te|writer|"
+    r"histor\w*|context|biograph\w*|life|influenc\w*|legacy|era|century|adaptation\w*)\b"
+)
+
+
+def _about_target(prompt: str) -> str | None:
+    """Return the compacted "<book>" of an "... about <book>" text/content question, if any."""
+    lc = prompt.lower()
+    m = _ABOUT_RE.search(lc)
+    if not m or _HISTORIAN_HINTS_RE.search(lc):
+        return None
+    return re.sub(r"[^a-z0-9]", "", m.group(1)) or None
+
+
+def _match_book_key(target: str, books: list[str]) -> str | None:
+    """Return the longest book key that `target` (from _about_target) starts with, if any."""
+    candidates = (target, target.removeprefix("the"))
+    matches = [k for k in books if k and any(c.startswith(k.lower()) for c in candidates)]
+    return max(matches, key=len) if matches else None
+
+
+async def _iterate_in_thread(fn, *args, stop=None) -> AsyncGenerator:
+    """Drive a blocking generator in a worker thread, yielding its items as they arrive.
+
+    If iteration ends early (cancelled or closed), `stop()` is called to ask the
+    generator to wind down, and the thread is always awaited before returning.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def _produce():
+        try:
+            for item in fn(*args):
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    producer = asyncio.create_task(asyncio.to_thread(_produce))
+    try:
+        while (item := await queue.get()) is not done:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        if stop is not None and not producer.done():
+            stop()
+        # Also on early close: the caller may hold a lock for the object the thread uses
+        await asyncio.shield(producer)
+
+
+async def _synthesize(prompt: str, meta: dict, passages: str) -> AsyncGenerator[str, None]:
+    """Stream a final answer composed from metadata and archivist output with a single LLM call."""
+    text = (
+        "You are a master literary critic. Answer the user's question using the book "
+        "metadata and the archivist's text-grounded findings below. Do not invent facts.\n\n"
+        f"QUESTION:\n{prompt}\n\n"
+        f"METADATA:\n{orjson.dumps(meta).decode()}\n\n"
+        f"ARCHIVIST FINDINGS:\n{passages}"
+    )
+    messages = [{"role": "user", "content": [{"type": "text", "text": text}]}]
+    async for delta in _iterate_in_thread(model.generate_stream, messages):
+        if delta.content:
+            yield delta.content
+
+
 # --- Define Specialist Tools & Agents ---
 
 # 1. Historian Agent (Local)
+
+# Web pages and full historian answers are cached on disk (keys ("page", url) and
+# ("answer", query)) so repeat lookups skip the network and the agent loop entirely.
+# Pages are cached as full, untruncated markdown and only successful fetches are
+# stored; both tools truncate to their own budget with smolagents' truncate_content
+# when reading.
+HISTORIAN_CACHE_TTL = int(os.getenv("HISTORIAN_CACHE_TTL", "86400"))
+_HISTORIAN_CACHE = diskcache.Cache(os.path.join(os.path.dirname(__file__), ".historian_cache"))
+MAX_CONCURRENT_FETCHES = 8
+
+
+def _page_markdown(html: str) -> str:
+    return re.sub(r"\n{3,}", "\n\n", markdownify(html).strip())
+
+
+class CachedVisitWebpageTool(VisitWebpageTool):
+    """visit_webpage with successfully fetched pages cached on disk by URL."""
+
+    def __init__(self, max_output_length: int = 40000):
+        super().__init__(max_output_length)
+        self._fetched = threading.local()
+
+    def _truncate_content(self, content: str, max_length: int) -> str:
+        # VisitWebpageTool.forward only calls this with the markdown of a page it fetched
+        # successfully; keep it whole for the cache, truncation happens in forward()
+        self._fetched.content = content
+        return content
+
+    def forward(self, url: str) -> str:
+        content = _HISTORIAN_CACHE.get(("page", url))
+        if content is None:
+            self._fetched.content = None
+            result = super().forward(url)
+            content = self._fetched.content
+            if content is None:
+                # Timeouts and fetch errors come back as messages and are not cached
+                return result
+            _HISTORIAN_CACHE.set(("page", url), content, expire=HISTORIAN_CACHE_TTL)
+        return truncate_content(content, self.max_output_length)
+
+
+class VisitWebpagesTool(Tool):
+    name = "visit_webpages"
+    description = (
+        "Visits several webpages concurrently and returns each one's content as markdown. "
+        "Prefer this over calling visit_webpage repeatedly when you need more than one page."
+    )
+    inputs = {"urls": {"type": "array", "description": "The URLs of the webpages to visit."}}
+    output_type = "string"
+
+    def __init__(self, max_output_length: int = 40000):
+        super().__init__()
+        self.max_output_length = max_output_length
+
+    async def _fetch_all(self, urls: list[str]) -> list[str]:
+        sem = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+        per_page = self.max_output_length // max(len(urls), 1)
+
+        async def fetch(client: httpx.AsyncClient, url: str) -> str:
+            # Errors are reported per page, like visit_webpage does, so one bad URL does
+            # not fail the whole call
+            content = _HISTORIAN_CACHE.get(("page", url))
+            if content is None:
+                try:
+                    async with sem:
+                        resp = await client.get(url)
+                        resp.raise_for_status()
+                    content = _page_markdown(resp.text)
+                except httpx.TimeoutException:
+                    return "The request timed out. Please try again later or check the URL."
+                except httpx.HTTPError as e:
+                    return f"Error fetching the webpage: {e}"
+                except Exception as e:
+                    return f"An unexpected error occurred: {e}"
+                _HISTORIAN_CACHE.set(("page", url), content, expire=HISTORIAN_CACHE_TTL)
+            return truncate_content(content, per_page)
+
+        async with httpx.AsyncClient(timeout=20, follow_redirects=True) as client:
+            return await asyncio.gather(*(fetch(client, url) for url in urls))
+
+    def forward(self, urls: list[str]) -> str:
+        # Tools run synchronously inside the agent's worker thread, which has no event loop
+        pages = asyncio.run(self._fetch_all(urls))
+        return "\n\n".join(f"## {url}\n{page}" for url, page in zip(urls, pages))
+
+
 historian_agent = CodeAgent(
-    tools=[DuckDuckGoSearchTool(), VisitWebpageTool()], 
+    tools=[DuckDuckGoSearchTool(), CachedVisitWebpageTool(), VisitWebpagesTool()],
     model=model
 )
 
 # 2. Archivist Agent (Remote Tool via HTTP)
+async def _ask_archivist(input: str) -> str:
+    try:
+        client = await _get_client(ARCHIVIST_URL)
+        run = await client.run_sync(
+            agent="archivist_agent",
+            input=[Message(parts=[MessagePart(content=input)])]
+        )
+        if run.output and run.output[0].parts:
+            return "".join(part.content for part in run.output[0].parts)
+        return "Archivist returned no content."
+    except Exception as e:
+        return f"Error communicating with Archivist agent: {e}"
+
+
 @smoltool
-async def archivist_agent(input: str) -> str:
+def archivist_agent(input: str) -> str:
     """For specific, factual questions about a book's content.
 
     Args:
         input (str): A JSON string with 'book_title' and 'query'.
     """
     try:
-        async with Client(base_url="http://127.0.0.1:8001") as client:
-            run = await client.run_sync(
-                agent="archivist_agent",
-                input=[Message(parts=[MessagePart(content=input)])]
-            )
-            if run.output and run.output[0].parts:
-                return run.output[0].parts[0].content
-            return "Archivist returned no content."
+        return _on_server_loop(_ask_archivist(input))
     except Exception as e:
         return f"Error communicating with Archivist agent: {e}"
 
 
-@server.agent(
-    name="literary_critic_agent",
-    metadata=Metadata(
-        ui={"type": "hands-off", "user_greeting": "Ask about a book..."}
-    ),
-)
-async def literary_critic_agent(
-    input: list[Message],
-) -> AsyncGenerator[RunYield, RunYieldResume]:
-    """This is the Literary Critic agent. It orchestrates a team of specialist agents to answer complex questions about books."""
+# Discovery backend is chosen once at import time. The async _list_books and
+# _book_metadata serve the handler's fast paths; the tools wrap them for the agent.
+USE_MCP = os.getenv("USE_MCP_DISCOVERY", "0") in {"1", "true", "True"}
 
-    # Catalog/discovery can be backed by filesystem (default) or MCP via ACP
-    DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
-    META_PATH = os.path.join(os.path.dirname(__file__), "book_metadata.json")
-    USE_MCP = os.getenv("USE_MCP_DISCOVERY", "0") in {"1", "true", "True"}
-
-    def _scan_books() -> list[str]:
-        if not os.path.isdir(DATA_DIR):
-            return []
-        return [
-            os.path.splitext(f)[0]
-            for f in os.listdir(DATA_DIR)
-            if f.endswith(".txt") and os.path.isfile(os.path.join(DATA_DIR, f))
-        ]
-
-    def _load_metadata() -> dict:
+if USE_MCP:
+    async def _list_books() -> list[str]:
         try:
-            with open(META_PATH, "r", encoding="utf-8") as fp:
-                return json.load(fp)
+            client = await _get_client(CATALOG_URL)
+            run = await client.run_sync(
+                agent="book_catalog_agent",
+                input=[Message(parts=[MessagePart(content="__LIST__")])],
+            )
+            if run.output and run.output[0].parts:
+                return orjson.loads(run.output[0].parts[0].content)
         except Exception:
-            return {}
-
-    if USE_MCP:
-        @smoltool
-        async def list_available_books() -> list[str]:
-            """Returns a list of all book keys by querying the MCP catalog via ACP."""
-            try:
-                async with Client(base_url="http://127.0.0.1:8003") as client:
-                    run = await client.run_sync(
-                        agent="book_catalog_agent",
-                        input=[Message(parts=[MessagePart(content="__LIST__")])],
-                    )
-                if run.output and run.output[0].parts:
-                    return json.loads(run.output[0].parts[0].content)
-            except Exception:
-                pass
-            # Fallback
-            return _scan_books()
+            pass
+        # Fallback
+        return _scan_books()
 
-        @smoltool
-        async def get_book_metadata(book_key: str) -> dict:
-            """Return metadata for a given book by querying the MCP catalog via ACP; fallback to local JSON."""
-            try:
-                async with Client(base_url="http://127.0.0.1:8003") as client:
-                    run = await client.run_sync(
-                        agent="book_catalog_agent",
-                        input=[Message(parts=[MessagePart(content=f"__META__:{book_key}")])],
-                    )
-                if run.output and run.output[0].parts:
-                    return json.loads(run.output[0].parts[0].content)
-            except Exception:
-                pass
-            # Fallback
-            meta = _load_metadata()
-            return meta.get(book_key, {})
-    else:
-        @smoltool
-        async def list_available_books() -> list[str]:
-            """Returns a list of all book keys (filenames without .txt) available in the library."""
+    async def _book_metadata(book_key: str) -> dict:
+        try:
+            client = await _get_client(CATALOG_URL)
+            run = await client.run_sync(
+                agent="book_catalog_agent",
+                input=[Message(parts=[MessagePart(content=f"__META__:{book_key}")])],
+            )
+            if run.output and run.output[0].parts:
+                return orjson.loads(run.output[0].parts[0].content)
+        except Exception:
+            pass
+        # Fallback
+        meta = _load_metadata()
+        return meta.get(book_key, {})
+
+    @smoltool
+    def list_available_books() -> list[str]:
+        """Returns a list of all book keys by querying the MCP catalog via ACP."""
+        try:
+            return _on_server_loop(_list_books())
+        except Exception:
             return _scan_books()
 
-        @smoltool
-        async def get_book_metadata(book_key: str) -> dict:
-            """Return metadata for a given book key from local JSON.
+    @smoltool
+    def get_book_metadata(book_key: str) -> dict:
+        """Return metadata for a given book by querying the MCP catalog via ACP; fallback to local JSON.
+
+        Args:
+            book_key (str): The filename (without .txt) identifying the book in `ai_librarian/data/`.
+        """
+        try:
+            return _on_server_loop(_book_metadata(book_key))
+        except Exception:
+            return _load_metadata().get(book_key, {})
+else:
+    async def _list_books() -> list[str]:
+        return _scan_books()
 
-            Args:
-                book_key (str): The filename (without .txt) identifying the book in `ai_librarian/data/`.
+    async def _book_metadata(book_key: str) -> dict:
+        return _load_metadata().get(book_key, {})
 
-            Returns:
-                dict: Metadata object from `book_metadata.json` (e.g., title, author, year). Returns an empty dict if not found.
-            """
-            meta = _load_metadata()
-            return meta.get(book_key, {})
+    @smoltool
+    def list_available_books() -> list[str]:
+        """Returns a list of all book keys (filenames without .txt) available in the library."""
+        return _scan_books()
 
-        # Define a correctly named wrapper for the historian agent tool
     @smoltool
-    def historian_agent_tool(query: str) -> str:
-        """Use this for historical context, author information, or critical reception about a book or author.
+    def get_book_metadata(book_key: str) -> dict:
+        """Return metadata for a given book key from local JSON.
 
         Args:
-            query (str): A natural language question requesting background or historical/critical context.
+            book_key (str): The filename (without .txt) identifying the book in `ai_librarian/data/`.
 
         Returns:
-            str: The historian agent's answer.
+            dict: Metadata object from `book_metadata.json` (e.g., title, author, year). Returns an empty dict if not found.
         """
-        return historian_agent.run(query)
+        meta = _load_metadata()
+        return meta.get(book_key, {})
 
-    all_tools = [
-        list_available_books,
-        get_book_metadata,
-        archivist_agent,
-        historian_agent_tool,
-    ]
 
-    agent = ToolCallingAgent(
-        tools=all_tools,
-        model=model,
-        instructions='''You are a master literary critic and AI librarian. Delegate to specialist tools and agents to answer questions about books in the library.
+# Define a correctly named wrapper for the historian agent tool
+@smoltool
+def historian_agent_tool(query: str) -> str:
+    """Use this for historical context, author information, or critical reception about a book or author.
+
+    Args:
+        query (str): A natural language question requesting background or historical/critical context.
+
+    Returns:
+        str: The historian agent's answer.
+    """
+    cached = _HISTORIAN_CACHE.get(("answer", query))
+    if cached is not None:
+        return cached
+    answer = historian_agent.run(query)
+    _HISTORIAN_CACHE.set(("answer", query), answer, expire=HISTORIAN_CACHE_TTL)
+    return answer
+
+
+all_tools = [
+    list_available_books,
+    get_book_metadata,
+    archivist_agent,
+    historian_agent_tool,
+]
+
+# The critic streams its model output so the final_answer tool call can be relayed to
+# the client token by token while it is still being generated.
+_ANSWER_ARG_RE = re.compile(r'"answer"\s*:\s*"')
+
+
+def _partial_answer(arguments: str) -> str:
+    """Decode as much of the `answer` string in partial final_answer arguments as has arrived."""
+    match = _ANSWER_ARG_RE.search(arguments)
+    if not match:
+        return ""
+    body = arguments[match.end():]
+    end = re.search(r'(?:^|[^\\])(?:\\\\)*"', body)
+    if end:
+        body = body[:end.end() - 1]
+    # Drop a trailing escape sequence that has only partly arrived (at most "\uXXX")
+    for cut in range(len(body), max(len(body) - 6, -1), -1):
+        try:
+            return orjson.loads(f'"{body[:cut]}"')
+        except orjson.JSONDecodeError:
+            continue
+    return ""
+
+
+# Built once and shared across requests; per-request input only goes through run().
+# run() resets the agent's memory, so runs on the shared agent are serialized.
+_CRITIC_LOCK = asyncio.Lock()
+_CRITIC_AGENT = ToolCallingAgent(
+    tools=all_tools,
+    model=model,
+    stream_outputs=True,
+    instructions='''You are a master literary critic and AI librarian. Delegate to specialist tools and agents to answer questions about books in the library.
 
 YOUR AVAILABLE TOOLS:
 - list_available_books(): List all book keys (filenames without .txt) in the library.
@@ -171,19 +476,31 @@ YOUR AVAILABLE TOOLS:
 PROCESS:
 1. If unsure what is available, call list_available_books().
 2. Identify the relevant book_key from the user's query.
-3. Use archivist_agent for quotes/summaries from the text; use historian_agent_tool for context.
+3. Use archivist_agent for quotes/summaries from the text; use historian_agent_tool for context. When a question needs both, call them in the same step so they run in parallel.
 4. Optionally call get_book_metadata to enrich your answer (titles, authors, years).
 5. Synthesize a cohesive response.
 
 Always use tools to ground your answers. Do not invent book keys; only use those from list_available_books.''',
-    )
+)
+
+
+@server.agent(
+    name="literary_critic_agent",
+    metadata=Metadata(
+        ui={"type": "hands-off", "user_greeting": "Ask about a book..."}
+    ),
+)
+async def literary_critic_agent(
+    input: list[Message],
+) -> AsyncGenerator[RunYield, RunYieldResume]:
+    """This is the Literary Critic agent. It orchestrates a team of specialist agents to answer complex questions about books."""
 
     prompt = input[0].parts[0].content
 
     # Fast-path intents: directly list books when asked, without relying on LLM routing.
     lc = prompt.lower()
     if ("book" in lc or "library" in lc) and ("list" in lc or "available" in lc or "have" in lc):
-        books = await list_available_books()
+        books = await _list_books()
         if not books:
             content = "No books found in the library. Add .txt files to the ai_librarian/data/ folder."
         else:
@@ -191,10 +508,77 @@ Always use tools to ground your answers. Do not invent book keys; only use those
         yield Message(parts=[MessagePart(content=content)])
         return
 
-    response = agent.run(prompt)
+    # Fast-path "about <book>" questions: metadata and text retrieval are independent,
+    # so fetch them concurrently and synthesize once instead of looping through tools.
+    # The catalog is only consulted once the prompt looks like one.
+    target = _about_target(prompt)
+    book_key = _match_book_key(target, await _list_books()) if target else None
+    if book_key:
+        meta, passages = await asyncio.gather(
+            _book_metadata(book_key),
+            _ask_archivist(orjson.dumps({"book_title": book_key, "query": prompt}).decode()),
+        )
+        # Stream the answer token by token so the client sees output immediately
+        async for chunk in _synthesize(prompt, meta, passages):
+            yield MessagePart(content=chunk)
+        return
+
+    streamed, response = "", None
+    async with _CRITIC_LOCK:
+        names: dict[int, str] = {}
+        arguments: dict[int, str] = {}
+        # If the client goes away mid-run, the shared agent is interrupted at its next
+        # step and its thread finishes before the lock is released
+        events = _iterate_in_thread(_CRITIC_AGENT.run, prompt, True, stop=_CRITIC_AGENT.interrupt)
+        try:
+            async for event in events:
+                if isinstance(event, ChatMessageStreamDelta) and event.tool_calls:
+                    for delta in event.tool_calls:
+                        if delta.function is None:
+                            continue
+                        if delta.function.name:
+                            names[delta.index] = delta.function.name
+                        arguments[delta.index] = arguments.get(delta.index, "") + (delta.function.arguments or "")
+                        if names.get(delta.index) != "final_answer":
+                            continue
+                        # Forward the final answer as it is generated
+                        answer = _partial_answer(arguments[delta.index])
+                        if len(answer) > len(streamed) and answer.startswith(streamed):
+                            yield MessagePart(content=answer[len(streamed):])
+                            streamed = answer
+                elif isinstance(event, ActionStep):
+                    # Tool call indexes restart with every step
+                    names.clear()
+                    arguments.clear()
+                elif isinstance(event, FinalAnswerStep):
+                    response = event.output
+        finally:
+            await events.aclose()
+
+    # Finish the stream, or send the authoritative answer whole if it diverged from it
+    response = str(response)
+    if response.startswith(streamed) and streamed:
+        if response != streamed:
+            yield MessagePart(content=response[len(streamed):])
+    else:
+        yield Message(parts=[MessagePart(content=response)])
+
+
+# Optional startup warm-up (WARMUP=1): prime the catalog caches and LiteLLM's HTTP
+# client before accepting requests.
+WARMUP = os.getenv("WARMUP", "0") in {"1", "true", "True"}
 
-    yield Message(parts=[MessagePart(content=str(response))])
+
+def _warmup():
+    _scan_books()
+    _load_metadata()
+    try:
+        model.generate([{"role": "user", "content": [{"type": "text", "text": "ping"}]}])
+    except Exception as e:
+        print(f"LLM warm-up failed: {e}")
 
 
 if __name__ == "__main__":
+    if WARMUP:
+        _warmup()
     server.run(port=8002)
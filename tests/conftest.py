@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The servers build their LLM clients at import time; no request is ever sent
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
@@ -0,0 +1,41 @@
+import pytest
+
+from crew_agent_server import _split_answers, _streamable_answer
+
+
+def test_split_answers_plain():
+    text = "ANSWER 1: Ahab.\nANSWER 2: The Pequod.\nIt sails from Nantucket."
+    assert _split_answers(text, 2) == {1: "Ahab.", 2: "The Pequod.\nIt sails from Nantucket."}
+
+
+@pytest.mark.parametrize(
+    "marker",
+    ["**ANSWER 1:**", "**ANSWER 1**:", "### ANSWER 1:", "_ANSWER 1:_", "Answer 1:", "  ANSWER 1 :"],
+)
+def test_split_answers_accepts_markdown_markers(marker):
+    assert _split_answers(f"{marker} Ahab.\n**ANSWER 2:** Ishmael.", 2) == {1: "Ahab.", 2: "Ishmael."}
+
+
+def test_split_answers_keeps_what_parsed():
+    # Question 2 is missing and 5 is out of range; the rest are still usable
+    text = "ANSWER 1: Ahab.\nANSWER 3: Queequeg.\nANSWER 5: ???"
+    assert _split_answers(text, 3) == {1: "Ahab.", 3: "Queequeg."}
+    assert _split_answers("no numbered answers at all", 2) == {}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Thought: thinking", None),
+        ("Thought: x\nFinal Answer:", ""),
+        ("Thought: x\nFinal Answer: Ahab is", "Ahab is"),
+        # A partial second marker is held back until it is known not to be one
+        ("Final Answer: Ahab\nFinal Ans", "Ahab"),
+        # The parser uses the last marker
+        ("Final Answer: draft\nFinal Answer: Ahab", "Ahab"),
+        # Trailing backticks may be an unmatched fence the parser strips
+        ("Final Answer: code ```py\nx = 1\n```", "code ```py\nx = 1"),
+    ],
+)
+def test_streamable_answer_follows_parser(text, expected):
+    assert _streamable_answer(text) == expected
@@ -0,0 +1,129 @@
+import hashlib
+import os
+
+import faiss
+import numpy as np
+import orjson
+import pytest
+
+from faiss_rag import FaissAdapter, artifact_paths, split_text
+
+
+@pytest.fixture
+def embed_calls(monkeypatch):
+    """Replace OpenAI embeddings with deterministic vectors; records each call's batch."""
+    calls = []
+
+    def fake_embed(self, texts):
+        calls.append(list(texts))
+        vectors = np.zeros((len(texts), 16), dtype="float32")
+        for row, text in enumerate(texts):
+            digest = hashlib.sha256(text.encode()).digest()
+            vectors[row] = np.frombuffer(digest[:16], dtype=np.uint8) + 1
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    monkeypatch.setattr(FaissAdapter, "_embed", fake_embed)
+    return calls
+
+
+@pytest.fixture
+def book(tmp_path):
+    source = tmp_path / "book.txt"
+    source.write_text(" ".join(f"word{i}" for i in range(2000)), encoding="utf-8")
+    return str(source)
+
+
+def _adapter(tmp_path, **kwargs):
+    return FaissAdapter(persist_dir=str(tmp_path / "cache"), chunk_size=300, chunk_overlap=50, **kwargs)
+
+
+def test_split_text_overlaps_and_breaks_on_whitespace():
+    text = " ".join(f"w{i}" for i in range(200))
+    chunks = split_text(text, 100, 20)
+    assert len(chunks) > 1
+    assert all(len(c) <= 100 for c in chunks)
+    # Windows end on whole words, and consecutive windows overlap
+    words = set(text.split())
+    assert all(c.split()[-1] in words for c in chunks)
+    assert all(a[-10:] in b for a, b in zip(chunks, chunks[1:]))
+    assert chunks[0].startswith("w0 ") and chunks[-1].endswith("w199")
+
+
+def test_split_text_short_and_empty():
+    assert split_text("short text", 100, 20) == ["short text"]
+    assert split_text("   \n ", 100, 20) == []
+
+
+@pytest.mark.parametrize("size, overlap", [(100, 100), (100, 150), (100, -1)])
+def test_split_text_rejects_overlap_not_below_size(size, overlap):
+    with pytest.raises(ValueError):
+        split_text("some text", size, overlap)
+
+
+def test_adapter_validates_chunking(tmp_path):
+    with pytest.raises(ValueError):
+        FaissAdapter(persist_dir=str(tmp_path), chunk_size=200, chunk_overlap=200)
+
+
+def test_add_builds_once_then_loads_from_persist_dir(tmp_path, book, embed_calls):
+    adapter = _adapter(tmp_path)
+    adapter.add(book)
+    assert len(embed_calls) == 1
+    assert adapter.query("word10")
+
+    reloaded = _adapter(tmp_path)
+    reloaded.add(book)
+    # Only the query above was embedded since; the chunks come from disk
+    assert len(embed_calls) == 2
+    assert reloaded._chunks == adapter._chunks
+    assert reloaded._index.ntotal == len(adapter._chunks)
+
+
+def test_source_change_triggers_rebuild(tmp_path, book, embed_calls):
+    _adapter(tmp_path).add(book)
+    with open(book, "a", encoding="utf-8") as fp:
+        fp.write(" appended")
+    _adapter(tmp_path).add(book)
+    assert len(embed_calls) == 2
+
+
+def test_index_settings_change_reuses_embeddings_and_persists_index(tmp_path, book, embed_calls):
+    _adapter(tmp_path).add(book)
+
+    flat = _adapter(tmp_path, quantization="none")
+    flat.add(book)
+    assert len(embed_calls) == 1
+    assert isinstance(flat._index, faiss.IndexHNSWFlat)
+
+    chunks_path, _, index_path = flat._persist_paths()
+    with open(chunks_path, "rb") as fp:
+        assert orjson.loads(fp.readline())["index"]["quantization"] == "none"
+    assert isinstance(faiss.read_index(index_path), faiss.IndexHNSWFlat)
+    assert not [name for name in os.listdir(tmp_path / "cache") if name.endswith(".tmp")]
+
+
+def test_has_artifacts_uses_prebuilt_files(tmp_path, book, embed_calls):
+    builder = _adapter(tmp_path)
+    assert not builder.has_artifacts(book)
+    builder.build(book, artifact_paths(book))
+
+    assert _adapter(tmp_path).has_artifacts(book)
+    # Index-only change: rebuilt from the shipped embeddings, not re-embedded
+    assert _adapter(tmp_path, hnsw_m=16).has_artifacts(book)
+    assert len(embed_calls) == 1
+
+
+def test_empty_source_has_no_index(tmp_path, embed_calls):
+    source = tmp_path / "empty.txt"
+    source.write_text("  \n\t ", encoding="utf-8")
+
+    adapter = _adapter(tmp_path)
+    adapter.add(str(source))
+    assert adapter._index is None
+    assert adapter.query("anything") == ""
+
+    reloaded = _adapter(tmp_path)
+    reloaded.add(str(source))
+    assert reloaded._chunks == []
+    assert reloaded.query("anything") == ""
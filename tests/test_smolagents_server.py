@@ -0,0 +1,50 @@
+import orjson
+import pytest
+
+from smolagents_server import _about_target, _match_book_key, _partial_answer
+
+BOOKS = ["mobydick", "dracula", "frankenstein", "prideandprejudice", "sherlockholmes"]
+
+
+@pytest.mark.parametrize(
+    "prompt, key",
+    [
+        ("Tell me about Moby Dick", "mobydick"),
+        ("What happens in the story about the novel Dracula?", "dracula"),
+        ("Summarize the plot about The Pride and Prejudice", "prideandprejudice"),
+        ("Tell me about Ulysses", None),
+    ],
+)
+def test_match_book_key(prompt, key):
+    target = _about_target(prompt)
+    assert target is not None
+    assert _match_book_key(target, BOOKS) == key
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "List the available books",
+        "What did critics say about Moby Dick?",
+        "Tell me about the author of Dracula",
+        "What is the historical context about Frankenstein?",
+    ],
+)
+def test_about_target_skips_non_content_questions(prompt):
+    assert _about_target(prompt) is None
+
+
+def test_partial_answer_decodes_prefixes():
+    answer = 'Ahab says "hi"\\ and é \U0001F600 end'
+    arguments = orjson.dumps({"answer": answer}).decode()
+    decoded = [_partial_answer(arguments[:i]) for i in range(len(arguments) + 1)]
+    assert decoded[-1] == answer
+    # Every decoded prefix only ever grows and is a prefix of the answer
+    assert all(answer.startswith(d) for d in decoded)
+    assert all(len(a) <= len(b) for a, b in zip(decoded, decoded[1:]))
+
+
+def test_partial_answer_without_answer_string():
+    assert _partial_answer("") == ""
+    assert _partial_answer('{"other": "x"}') == ""
+    assert _partial_answer('{"answer": 42}') == ""